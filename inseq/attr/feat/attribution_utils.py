@@ -1,11 +1,12 @@
 import logging
 import math
+from contextlib import nullcontext
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 import torch
 
 from ...data.batch import DecoderOnlyBatch, EncoderDecoderBatch
-from ...utils import extract_signature_args
+from ...utils import extract_signature_args, get_autocast_kwargs
 from ...utils.typing import (
     OneOrMoreAttributionSequences,
     OneOrMoreIdSequences,
@@ -91,6 +92,9 @@ def get_step_scores(
 ) -> SingleScorePerStepTensor:
     """
     Returns step scores for the target tokens in the batch.
+
+    If ``step_scores_args`` contains ``low_precision=True``, the forward pass is performed in mixed precision on CUDA
+    devices. Output logits are cast back to full precision before computing the score.
     """
     if attribution_model is None:
         raise ValueError("Attribution model is not set.")
@@ -100,13 +104,19 @@ def get_step_scores(
             f"{', '.join(list(STEP_SCORES_MAP.keys()))}. Use the inseq.register_step_function"
             "function to register a custom step score."
         )
+    step_scores_args = dict(step_scores_args)
+    low_precision = step_scores_args.pop("low_precision", False)
     with torch.no_grad():
-        output = attribution_model.get_forward_output(
-            **attribution_model.format_forward_args(
-                batch, use_embeddings=attribution_model.attribution_method.forward_batch_embeds
-            ),
-            use_embeddings=attribution_model.attribution_method.forward_batch_embeds,
-        )
+        autocast = torch.autocast(**get_autocast_kwargs(attribution_model.device)) if low_precision else nullcontext()
+        with autocast:
+            output = attribution_model.get_forward_output(
+                **attribution_model.format_forward_args(
+                    batch, use_embeddings=attribution_model.attribution_method.forward_batch_embeds
+                ),
+                use_embeddings=attribution_model.attribution_method.forward_batch_embeds,
+            )
+        if low_precision and getattr(output, "logits", None) is not None:
+            output.logits = output.logits.float()
         step_scores_args = attribution_model.format_step_function_args(
             forward_output=output,
             encoder_input_ids=batch.source_ids,
@@ -121,9 +131,13 @@ def get_step_scores(
         return STEP_SCORES_MAP[score_identifier](**step_scores_args)
 
 
-def join_token_ids(tokens: OneOrMoreTokenSequences, ids: OneOrMoreIdSequences) -> List[TokenWithId]:
-    """Builds a list of TokenWithId objects from a list of token sequences and a list of id sequences."""
-    return [[TokenWithId(token, id) for token, id in zip(tok_seq, idx_seq)] for tok_seq, idx_seq in zip(tokens, ids)]
+def join_token_ids(tokens: OneOrMoreTokenSequences, ids: OneOrMoreIdSequences) -> List[List[TokenWithId]]:
+    """Builds a list of TokenWithId objects from a list of token sequences and a list of id sequences.
+
+    Ids should be provided as nested lists (e.g. from a single ``tensor.tolist()`` call) rather than tensors to avoid
+    per-element tensor indexing.
+    """
+    return [list(map(TokenWithId, tok_seq, idx_seq)) for tok_seq, idx_seq in zip(tokens, ids)]
 
 
 def extract_args(
@@ -26,6 +26,7 @@ from torchtyping import TensorType
 from transformers import set_seed
 
 from ...data import (
+    BatchEncoding,
     DecoderOnlyBatch,
     EncoderDecoderBatch,
     FeatureAttributionInput,
@@ -209,7 +210,10 @@ class FeatureAttribution(Registry):
         inputs = (sources, targets)
         if not self.attribution_model.is_encoder_decoder:
             inputs = targets
-            encoded_sources = self.attribution_model.encode(sources, return_baseline=True)
+            if isinstance(sources, BatchEncoding):
+                encoded_sources = sources
+            else:
+                encoded_sources = self.attribution_model.encode(sources, return_baseline=True)
             # We do this here to support separate attr_pos_start for different sentences when batching
             if attr_pos_start is None or attr_pos_start < encoded_sources.input_ids.shape[1]:
                 attr_pos_start = encoded_sources.input_ids.shape[1]
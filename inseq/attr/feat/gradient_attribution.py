@@ -53,6 +53,8 @@ class GradientAttributionRegistry(FeatureAttribution, Registry):
                 self.target_layer = rgetattr(self.attribution_model.model, self.target_layer)
         if not self.attribute_batch_ids:
             self.attribution_model.configure_interpretable_embeddings()
+        if self.attribution_model.gradient_checkpointing:
+            self.attribution_model.configure_gradient_checkpointing(enable=True)
 
     @unset_hook
     def unhook(self, **kwargs):
@@ -63,6 +65,8 @@ class GradientAttributionRegistry(FeatureAttribution, Registry):
             self.target_layer = None
         else:
             self.attribution_model.remove_interpretable_embeddings()
+        if self.attribution_model.gradient_checkpointing:
+            self.attribution_model.configure_gradient_checkpointing(enable=False)
 
     def attribute_step(
         self,
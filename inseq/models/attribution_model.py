@@ -1,8 +1,13 @@
 import logging
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from inspect import signature
 from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 import torch
+import torch.distributed as dist
 
 from ..attr import STEP_SCORES_MAP
 from ..attr.feat import FeatureAttribution, extract_args, join_token_ids
@@ -13,7 +18,18 @@ from ..data import (
     FeatureAttributionOutput,
     FeatureAttributionStepOutput,
 )
-from ..utils import MissingAttributionMethodError, check_device, format_input_texts, get_default_device, isnotebook
+from ..utils import (
+    MissingAttributionMethodError,
+    check_device,
+    check_generation_prefixes,
+    format_input_texts,
+    get_autocast_kwargs,
+    get_default_device,
+    get_rank_and_world_size,
+    get_shard_slice,
+    is_torch_compile_enabled,
+    isnotebook,
+)
 from ..utils.typing import (
     EmbeddingsTensor,
     ExpandedTargetIdsTensor,
@@ -45,9 +61,11 @@ class AttributionModel(ABC, torch.nn.Module):
         is_encoder_decoder (:obj:`bool`): Whether the model is an encoder-decoder model.
         pad_token (:obj:`str`): The pad token used by the model.
         embed_scale (:obj:`float`): Value used to scale the embeddings.
-        device (:obj:`str`): The device on which the model is located.
+        device (:obj:`torch.device`): The device on which the model is located.
         attribution_method (:class:`~inseq.attr.FeatureAttribution`): The attribution method used alongside the model.
         is_hooked (:obj:`bool`): Whether the model is currently hooked by the attribution method.
+        gradient_checkpointing (:obj:`bool`): Whether activations are recomputed during the backward pass of
+            gradient-based attribution methods to reduce memory usage.
         default_attributed_fn_id (:obj:`str`): The id for the default step function used as attribution target.
     """
 
@@ -65,6 +83,9 @@ class AttributionModel(ABC, torch.nn.Module):
         "decoder_attention_mask",
     ]
 
+    # Maximum number of non-default attribution methods kept for reuse across attribute calls.
+    _ATTRIBUTION_METHOD_CACHE_SIZE = 4
+
     def __init__(self, **kwargs) -> None:
         super().__init__()
         if not hasattr(self, "model"):
@@ -73,29 +94,75 @@ class AttributionModel(ABC, torch.nn.Module):
             self.is_encoder_decoder = True
         self.pad_token = None
         self.embed_scale = None
-        self._device = None
+        self._device: Optional[torch.device] = None
+        self._is_cuda = False
         self.attribution_method = None
         self.is_hooked = False
+        self.gradient_checkpointing = False
+        self._attribution_method_cache: "OrderedDict[Tuple[Any, ...], FeatureAttribution]" = OrderedDict()
         self._default_attributed_fn_id = "probability"
 
     @property
-    def device(self) -> Optional[str]:
+    def device(self) -> Optional[torch.device]:
         return self._device
 
     @device.setter
-    def device(self, new_device: str) -> None:
-        check_device(new_device)
-        self._device = new_device
+    def device(self, new_device: Union[str, torch.device]) -> None:
+        self._set_device(new_device)
         if self.model:
             self.model.to(self._device)
 
-    def setup(self, device: Optional[str] = None, attribution_method: Optional[str] = None, **kwargs) -> None:
-        """Move the model to device and in eval mode."""
+    def _set_device(self, new_device: Union[str, torch.device]) -> None:
+        """Validates and stores the new device. Moving the model is left to the device setters."""
+        new_device = torch.device(new_device)
+        check_device(new_device.type)
+        self._device = new_device
+        self._is_cuda = new_device.type == "cuda"
+
+    def setup(
+        self,
+        device: Optional[str] = None,
+        attribution_method: Optional[str] = None,
+        gradient_checkpointing: bool = False,
+        **kwargs,
+    ) -> None:
+        """Move the model to device and in eval mode.
+
+        If ``gradient_checkpointing`` is True, gradient-based attribution methods enable activation checkpointing on
+        the model while hooked, trading extra forward computation for lower memory usage during attribution.
+
+        If the ``INSEQ_TORCH_COMPILE=1`` environment variable is set, the model is compiled with :obj:`torch.compile`
+        to speed up the repeated forward and backward passes performed during attribution. Attribute access is
+        forwarded to the original module by the compiled wrapper, while ``generate`` keeps running uncompiled.
+        Compilation is skipped for attribution methods not supporting it (see :meth:`supports_compiled_model`), and
+        the original module is used when such methods are selected at attribution time.
+        """
         self.device = device if device is not None else get_default_device()
+        self.gradient_checkpointing = gradient_checkpointing
         if self.model:
             self.model.eval()
-            self.model.zero_grad()
+            # Freshly loaded models have no gradients to clear
+            if any(param.grad is not None for param in self.model.parameters()):
+                self.model.zero_grad(set_to_none=True)
             self.attribution_method = self.get_attribution_method(attribution_method, **kwargs)
+            if (
+                is_torch_compile_enabled()
+                and not hasattr(self.model, "_orig_mod")
+                and self.supports_compiled_model(self.attribution_method)
+            ):
+                self.model = torch.compile(self.model, mode="reduce-overhead", fullgraph=False, dynamic=True)
+
+    @staticmethod
+    def supports_compiled_model(attribution_method: FeatureAttribution) -> bool:
+        """Whether the attribution method can be used with a model compiled with :obj:`torch.compile`.
+
+        Compiled models ignore module hooks registered after compilation, so methods registering hooks at attribution
+        time (layer methods and DeepLIFT) would silently produce wrong attributions. LIME is perturbation-based and is
+        not expected to benefit from compilation.
+        """
+        if attribution_method.attribute_batch_ids and not attribution_method.forward_batch_embeds:
+            return False
+        return attribution_method.method_name not in ("deeplift", "lime")
 
     @property
     def default_attributed_fn_id(self) -> str:
@@ -111,7 +178,10 @@ class AttributionModel(ABC, torch.nn.Module):
     def info(self) -> Dict[Optional[str], Optional[str]]:
         return {
             "model_name": self.model_name,
-            "model_class": self.model.__class__.__name__ if self.model is not None else None,
+            # Compiled models are wrapped, report the class of the original module
+            "model_class": getattr(self.model, "_orig_mod", self.model).__class__.__name__
+            if self.model is not None
+            else None,
         }
 
     def get_attribution_method(
@@ -124,6 +194,9 @@ class AttributionModel(ABC, torch.nn.Module):
         if not method:
             if not self.attribution_method:
                 raise MissingAttributionMethodError()
+            # The default method is unhooked while temporary methods are in use
+            if not self.is_hooked:
+                self.attribution_method.hook()
         else:
             if self.attribution_method:
                 self.attribution_method.unhook()
@@ -133,9 +206,36 @@ class AttributionModel(ABC, torch.nn.Module):
                 self.attribution_method = FeatureAttribution.load(method, attribution_model=self, **kwargs)
             # Temporarily use the current method without overriding the default
             else:
-                return FeatureAttribution.load(method, attribution_model=self, **kwargs)
+                return self._load_cached_attribution_method(method, **kwargs)
         return self.attribution_method
 
+    def _load_cached_attribution_method(self, method: str, **kwargs) -> FeatureAttribution:
+        """Returns a previously loaded instance of a non-default attribution method if available, hooking it again
+        to the model. Otherwise, loads the method and caches it, evicting the least recently used one if needed.
+
+        Hooks are not idempotent, so cached instances are unhooked before being hooked again in case a previous
+        attribution was interrupted before unhooking them."""
+        key_args = []
+        for arg_name, arg_value in sorted(kwargs.items()):
+            try:
+                hash(arg_value)
+            except TypeError:
+                arg_value = repr(arg_value)
+            key_args.append((arg_name, arg_value))
+        cache_key = (method, tuple(key_args))
+        if cache_key in self._attribution_method_cache:
+            self._attribution_method_cache.move_to_end(cache_key)
+            attribution_method = self._attribution_method_cache[cache_key]
+            attribution_method.unhook()
+            attribution_method.hook(**kwargs)
+            return attribution_method
+        attribution_method = FeatureAttribution.load(method, attribution_model=self, **kwargs)
+        self._attribution_method_cache[cache_key] = attribution_method
+        # Evicted methods are not unhooked: hooks act on the shared model, and only the last loaded method is active
+        if len(self._attribution_method_cache) > self._ATTRIBUTION_METHOD_CACHE_SIZE:
+            self._attribution_method_cache.popitem(last=False)
+        return attribution_method
+
     def get_attributed_fn(
         self, attributed_fn: Union[str, Callable[..., SingleScorePerStepTensor], None] = None
     ) -> Callable[..., SingleScorePerStepTensor]:
@@ -161,13 +261,15 @@ class AttributionModel(ABC, torch.nn.Module):
         pretty_progress: bool = False,
         output_step_attributions: bool = False,
         attribute_target: bool = False,
-        step_scores: List[str] = [],
+        step_scores: Optional[List[str]] = None,
         include_eos_baseline: bool = False,
         attributed_fn: Union[str, Callable[..., SingleScorePerStepTensor], None] = None,
         device: Optional[str] = None,
         batch_size: Optional[int] = None,
+        internal_batch_size: Optional[int] = None,
         generate_from_target_prefix: bool = False,
-        generation_args: Dict[str, Any] = {},
+        generation_args: Optional[Dict[str, Any]] = None,
+        distributed: bool = False,
         **kwargs,
     ) -> FeatureAttributionOutput:
         """Perform sequential attribution of input texts for every token in generated texts using the specified method.
@@ -199,9 +301,10 @@ class AttributionModel(ABC, torch.nn.Module):
                 target prefix alongside the input text. default: False. Note that an encoder-decoder attribution not
                 accounting for the target prefix does not correctly reflect the overall input importance, since part of
                 the input is not included in the attribution.
-            step_scores (:obj:`list(str)`): A list of step function identifiers specifying the step scores to be
-                computed alongside the attribution process. Available step functions are listed in
-                :func:`~inseq.list_step_functions`.
+            step_scores (:obj:`list(str)`, `optional`): A list of step function identifiers specifying the step
+                scores to be computed alongside the attribution process. Available step functions are listed in
+                :func:`~inseq.list_step_functions`. Passing ``step_scores_args={"low_precision": True}`` runs the
+                forward pass used for step scores in mixed precision on CUDA devices, while attribution is unaffected.
             include_eos_baseline (:obj:`bool`, `optional`): Whether to include the EOS token in attributed tokens when
                 using an attribution method requiring a baseline. default: False.
             attributed_fn (:obj:`str` or :obj:`Callable`, `optional`): The identifier associated to the step function
@@ -212,13 +315,24 @@ class AttributionModel(ABC, torch.nn.Module):
                 device will be used.
             batch_size (:obj:`int`, `optional`): The batch size to use to dilute the attribution computation over the
                 set of inputs. If no batch size is provided, the full set of input texts will be attributed at once.
+            internal_batch_size (:obj:`int`, `optional`): The number of scaled inputs processed at once by attribution
+                methods approximating an integral over multiple steps (e.g. ``integrated_gradients``). If not
+                provided, all ``n_steps`` scaled inputs of a batch are processed at once. Ignored by methods that do
+                not support it.
             generate_from_target_prefix (:obj:`bool`, `optional`): Whether the ``generated_texts`` should be used as
                 target prefixes for the generation process. If False, the ``generated_texts`` will be used as full
                 targets. This option is only available for encoder-decoder models, since the same behavior can be
                 achieved by modifying the input texts for decoder-only models. Default: False.
+            distributed (:obj:`bool`, `optional`): Whether to split the attribution across the ranks of the initialized
+                :mod:`torch.distributed` process group (e.g. ``dist.init_process_group("nccl")`` with one process per
+                GPU and ``torch.cuda.set_device(local_rank)``). If True, ``attribute`` must be called with the same
+                inputs on all ranks: each rank generates and attributes a contiguous shard of the input texts, and the
+                outputs are gathered on all ranks before being merged. Default: False.
             **kwargs: Additional keyword arguments. These can include keyword arguments for the attribution method, for
                 the generation process or for the attributed function. Generation arguments can be provided explicitly
-                as a dictionary named ``generation_args``.
+                as a dictionary named ``generation_args``. Passing ``generation_args={"low_precision": True}`` runs the
+                generation preceding attribution in mixed precision on CUDA devices, at the cost of possibly different
+                generated texts compared to full precision.
 
         Returns:
             :class:`~inseq.FeatureAttributionOutput`: The attribution output object containing the attribution scores,
@@ -227,6 +341,9 @@ class AttributionModel(ABC, torch.nn.Module):
         """
         if not input_texts:
             raise ValueError("At least one text must be provided to perform attribution.")
+        step_scores = [] if step_scores is None else step_scores
+        # Copied to avoid mutating the caller's dictionary
+        generation_args = {} if generation_args is None else dict(generation_args)
         if attribute_target and not self.is_encoder_decoder:
             logger.warning("attribute_target parameter is set to True, but will be ignored (not an encoder-decoder).")
             attribute_target = False
@@ -239,72 +356,144 @@ class AttributionModel(ABC, torch.nn.Module):
         if device is not None:
             self.device = device
         input_texts, generated_texts = format_input_texts(input_texts, generated_texts)
+        rank, world_size = get_rank_and_world_size() if distributed else (0, 1)
+        if distributed and world_size == 1:
+            logger.warning("distributed is set to True, but torch.distributed is not initialized with multiple ranks.")
+        is_sharded = world_size > 1 and len(input_texts) >= world_size
+        if is_sharded:
+            all_input_texts = input_texts
+            shard = get_shard_slice(len(input_texts), rank, world_size)
+            input_texts = input_texts[shard]
+            if generated_texts is not None:
+                generated_texts = generated_texts[shard]
+            logger.info("Rank %d/%d: attributing %d input texts.", rank, world_size, len(input_texts))
         if batch_size is not None:
             n_batches = len(input_texts) // batch_size + ((len(input_texts) % batch_size) > 0)
-            logger.info(f"Splitting input texts into {n_batches} batches of size {batch_size}.")
+            logger.info("Splitting input texts into %d batches of size %d.", n_batches, batch_size)
         has_generated_texts = generated_texts is not None
         # If constrained decoding is not enabled, output texts are generated from input texts.
         if not has_generated_texts or generate_from_target_prefix:
-            encoded_input = self.encode(input_texts, return_baseline=True, include_eos_baseline=include_eos_baseline)
+            # Baselines are only needed for attribution, and are computed per batch in _encode_attribution_batch
+            encoded_input = self.encode(input_texts)
+            # Reuse past keys and values across decoding steps unless explicitly disabled by the user
+            generation_args = {"use_cache": True, **generation_args}
             if generate_from_target_prefix:
                 decoder_input = self.encode(generated_texts, as_targets=True)
                 generation_args["decoder_input_ids"] = decoder_input.input_ids
-            generated_texts = self.generate(encoded_input, return_generation_output=False, **generation_args)
+            low_precision = generation_args.pop("low_precision", False)
+            generated_texts = self._generate_fast(encoded_input, low_precision=low_precision, **generation_args)
         else:
             if generation_args:
                 logger.warning(
-                    f"Generation arguments {generation_args} are provided, but will be ignored (constrained decoding)."
+                    "Generation arguments %s are provided, but will be ignored (constrained decoding).",
+                    generation_args,
                 )
-        logger.debug(f"reference_texts={generated_texts}")
+        # Both generation and format_input_texts produce sequences, so no further normalization is needed below
+        assert not isinstance(generated_texts, str)
+        logger.debug("reference_texts=%s", generated_texts)
         attribution_method = self.get_attribution_method(method, override_default_attribution)
-        attributed_fn = self.get_attributed_fn(attributed_fn)
-        attribution_args, attributed_fn_args, step_scores_args = extract_args(
-            attribution_method, attributed_fn, step_scores, default_args=self._DEFAULT_ATTRIBUTED_FN_ARGS, **kwargs
-        )
-        if isnotebook():
-            logger.debug("Pretty progress currently not supported in notebooks, falling back to tqdm.")
-            pretty_progress = False
-        if not self.is_encoder_decoder:
-            assert all(
-                generated_texts[idx].startswith(input_texts[idx]) for idx in range(len(input_texts))
-            ), "Forced generations with decoder-only models must start with the input texts."
-            if has_generated_texts and len(input_texts) > 1:
-                logger.info(
-                    "Batched constrained decoding is currently not supported for decoder-only models."
-                    " Using batch size of 1."
-                )
+        compiled_model = None
+        try:
+            attributed_fn = self.get_attributed_fn(attributed_fn)
+            attribution_args, attributed_fn_args, step_scores_args = extract_args(
+                attribution_method, attributed_fn, step_scores, default_args=self._DEFAULT_ATTRIBUTED_FN_ARGS, **kwargs
+            )
+            if internal_batch_size is not None:
+                method_attribute_fn = getattr(getattr(attribution_method, "method", None), "attribute", None)
+                if (
+                    method_attribute_fn is not None
+                    and "internal_batch_size" in signature(method_attribute_fn).parameters
+                ):
+                    attribution_args["internal_batch_size"] = internal_batch_size
+                else:
+                    logger.warning(
+                        "internal_batch_size is not supported by %s and will be ignored.",
+                        attribution_method.method_name,
+                    )
+            if isnotebook():
+                logger.debug("Pretty progress currently not supported in notebooks, falling back to tqdm.")
+                pretty_progress = False
+            if not self.is_encoder_decoder:
+                check_generation_prefixes(input_texts, generated_texts)
+                if has_generated_texts and len(input_texts) > 1:
+                    logger.info(
+                        "Batched constrained decoding is currently not supported for decoder-only models."
+                        " Using batch size of 1."
+                    )
+                    batch_size = 1
+                if len(input_texts) > 1 and (attr_pos_start is not None or attr_pos_end is not None):
+                    logger.info(
+                        "Custom attribution positions are currently not supported when batching generations for"
+                        " decoder-only models. Using batch size of 1."
+                    )
+                    batch_size = 1
+            if attribution_method.method_name == "lime":
+                logger.info("Batched attribution currently not supported for LIME. Using batch size of 1.")
                 batch_size = 1
-            if len(input_texts) > 1 and (attr_pos_start is not None or attr_pos_end is not None):
-                logger.info(
-                    "Custom attribution positions are currently not supported when batching generations for"
-                    " decoder-only models. Using batch size of 1."
+            if batch_size is None:
+                batch_size = len(input_texts)
+            batch_slices = [slice(i, i + batch_size) for i in range(0, len(input_texts), batch_size)]
+            if hasattr(self.model, "_orig_mod") and not self.supports_compiled_model(attribution_method):
+                logger.debug("Using the uncompiled model for %s.", attribution_method.method_name)
+                compiled_model, self.model = self.model, self.model._orig_mod
+            # Tokenization of the next batch runs in a background thread while the current batch is attributed.
+            # The CUDA device is per-thread, so the current one is forwarded to the worker.
+            cuda_device = None
+            if self._is_cuda:
+                cuda_device = self.device.index if self.device.index is not None else torch.cuda.current_device()
+            attribution_outputs = []
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                next_encodings = executor.submit(
+                    self._encode_attribution_batch,
+                    input_texts[batch_slices[0]],
+                    generated_texts[batch_slices[0]],
+                    include_eos_baseline,
+                    cuda_device,
                 )
-                batch_size = 1
-        if attribution_method.method_name == "lime":
-            logger.info("Batched attribution currently not supported for LIME. Using batch size of 1.")
-            batch_size = 1
-        attribution_outputs = attribution_method.prepare_and_attribute(
-            input_texts,
-            generated_texts,
-            batch_size=batch_size,
-            attr_pos_start=attr_pos_start,
-            attr_pos_end=attr_pos_end,
-            show_progress=show_progress,
-            pretty_progress=pretty_progress,
-            output_step_attributions=output_step_attributions,
-            attribute_target=attribute_target,
-            step_scores=step_scores,
-            include_eos_baseline=include_eos_baseline,
-            attributed_fn=attributed_fn,
-            attribution_args=attribution_args,
-            attributed_fn_args=attributed_fn_args,
-            step_scores_args=step_scores_args,
-        )
+                for batch_idx in range(len(batch_slices)):
+                    sources, targets = next_encodings.result()
+                    if batch_idx + 1 < len(batch_slices):
+                        next_slice = batch_slices[batch_idx + 1]
+                        next_encodings = executor.submit(
+                            self._encode_attribution_batch,
+                            input_texts[next_slice],
+                            generated_texts[next_slice],
+                            include_eos_baseline,
+                            cuda_device,
+                        )
+                    logger.debug("Processing batch %d of %d...", batch_idx + 1, len(batch_slices))
+                    attribution_outputs += attribution_method.prepare_and_attribute(
+                        sources,
+                        targets,
+                        attr_pos_start=attr_pos_start,
+                        attr_pos_end=attr_pos_end,
+                        show_progress=show_progress,
+                        pretty_progress=pretty_progress,
+                        output_step_attributions=output_step_attributions,
+                        attribute_target=attribute_target,
+                        step_scores=step_scores,
+                        include_eos_baseline=include_eos_baseline,
+                        attributed_fn=attributed_fn,
+                        attribution_args=attribution_args,
+                        attributed_fn_args=attributed_fn_args,
+                        step_scores_args=step_scores_args,
+                    )
+        finally:
+            # The compiled model is restored and temporary methods are unhooked also when attribution fails, so that
+            # compilation is not lost and methods are not hooked twice when reused from the cache
+            if compiled_model is not None:
+                self.model = compiled_model
+            if attribution_method is not self.attribution_method:
+                attribution_method.unhook()
+        if is_sharded:
+            gathered = [None] * world_size
+            dist.all_gather_object(gathered, (generated_texts, attribution_outputs))
+            input_texts = all_input_texts
+            generated_texts = [text for rank_texts, _ in gathered for text in rank_texts]
+            attribution_outputs = [out for _, rank_outputs in gathered for out in rank_outputs]
         attribution_output = FeatureAttributionOutput.merge_attributions(attribution_outputs)
         attribution_output.info["input_texts"] = input_texts
-        attribution_output.info["generated_texts"] = (
-            [generated_texts] if isinstance(generated_texts, str) else generated_texts
-        )
+        attribution_output.info["generated_texts"] = generated_texts
         attribution_output.info["generation_args"] = generation_args
         attribution_output.info["constrained_decoding"] = has_generated_texts
         attribution_output.info["generate_from_target_prefix"] = generate_from_target_prefix
@@ -313,13 +502,51 @@ class AttributionModel(ABC, torch.nn.Module):
         return attribution_output
 
     def embed(self, inputs: Union[TextInput, IdsTensor], as_targets: bool = False):
-        if isinstance(inputs, str) or (
-            isinstance(inputs, list) and len(inputs) > 0 and all([isinstance(x, str) for x in inputs])
-        ):
+        # Lists of inputs are homogeneous, so checking the first element is enough
+        if isinstance(inputs, str) or (isinstance(inputs, list) and len(inputs) > 0 and isinstance(inputs[0], str)):
             batch = self.encode(inputs, as_targets)
             inputs = batch.input_ids
         return self.embed_ids(inputs, as_targets=as_targets)
 
+    @unhooked
+    def _generate_fast(
+        self, encodings: Union[TextInput, BatchEncoding], low_precision: bool = False, **kwargs
+    ) -> List[str]:
+        """Generates texts without gradients, using mixed precision on CUDA devices if ``low_precision`` is True.
+
+        Only used for the generation preceding attribution, which runs with full precision and gradients enabled.
+        Inference mode is avoided on purpose: tensors created lazily by the model during generation (e.g. rotary
+        embedding caches) would be cached as inference tensors, which cannot be saved for the backward pass of
+        gradient-based attribution methods.
+        """
+        autocast = torch.autocast(**get_autocast_kwargs(self.device)) if low_precision else nullcontext()
+        with torch.no_grad(), autocast:
+            return self.generate(encodings, return_generation_output=False, **kwargs)
+
+    def _encode_attribution_batch(
+        self,
+        input_texts: List[str],
+        generated_texts: List[str],
+        include_eos_baseline: bool = False,
+        cuda_device: Optional[int] = None,
+    ) -> Tuple[BatchEncoding, BatchEncoding]:
+        """Encodes a batch of sources and targets as expected by
+        :meth:`~inseq.attr.feat.FeatureAttribution.prepare_and_attribute`.
+
+        ``cuda_device`` is the CUDA device used by the worker thread. It is None when the model is not on a CUDA
+        device, so that CUDA is not initialized by the worker.
+        """
+        with torch.cuda.device(cuda_device) if cuda_device is not None else nullcontext():
+            if self.is_encoder_decoder:
+                sources = self.encode(input_texts, return_baseline=True, include_eos_baseline=include_eos_baseline)
+                targets = self.encode(
+                    generated_texts, as_targets=True, return_baseline=True, include_eos_baseline=include_eos_baseline
+                )
+            else:
+                sources = self.encode(input_texts, return_baseline=True)
+                targets = self.encode(generated_texts, return_baseline=True, include_eos_baseline=include_eos_baseline)
+        return sources, targets
+
     def tokenize_with_ids(
         self, inputs: TextInput, as_targets: bool = False, skip_special_tokens: bool = True
     ) -> List[List[TokenWithId]]:
@@ -429,6 +656,14 @@ class AttributionModel(ABC, torch.nn.Module):
         """
         pass
 
+    def configure_gradient_checkpointing(self, enable: bool = True) -> None:
+        """Enable or disable activation checkpointing in the wrapped model for gradient attribution.
+
+        Called by gradient-based attribution methods when hooking and unhooking if ``gradient_checkpointing`` is set.
+        Models that do not support checkpointing can skip this method.
+        """
+        pass
+
     # Architecture-specific methods
 
     @abstractmethod
@@ -1,9 +1,11 @@
 """ HuggingFace Seq2seq model """
 import logging
+import threading
 from abc import abstractmethod
 from typing import Dict, List, NoReturn, Optional, Tuple, Union
 
 import torch
+import transformers
 from torch import long
 from transformers import (
     AutoConfig,
@@ -11,12 +13,14 @@ from transformers import (
     AutoModelForSeq2SeqLM,
     AutoTokenizer,
     PreTrainedModel,
-    PreTrainedTokenizer, GPT2Tokenizer,
+    PreTrainedTokenizer,
+    PreTrainedTokenizerBase,
+    GPT2Tokenizer,
 )
 from transformers.modeling_outputs import CausalLMOutput, ModelOutput, Seq2SeqLMOutput
 
 from ..data import BatchEncoding
-from ..utils import check_device
+from ..utils import is_torch_cache_enabled, torch_model_cache
 from ..utils.typing import (
     EmbeddingsTensor,
     FullLogitsTensor,
@@ -48,7 +52,7 @@ class HuggingfaceModel(AttributionModel):
         model (:obj:`transformers.AutoModelForSeq2SeqLM` or :obj:`transformers.AutoModelForSeq2SeqLM`):
             the model on which attribution is performed.
         tokenizer (:obj:`transformers.AutoTokenizer`): the tokenizer associated to the model.
-        device (:obj:`str`): the device on which the model is run.
+        device (:obj:`torch.device`): the device on which the model is run.
         encoder_int_embeds (:obj:`captum.InterpretableEmbeddingBase`): the interpretable embedding layer for the
             encoder, used for layer attribution methods in Captum.
         decoder_int_embeds (:obj:`captum.InterpretableEmbeddingBase`): the interpretable embedding layer for the
@@ -105,6 +109,8 @@ class HuggingfaceModel(AttributionModel):
             self.detokenizer = GPT2Tokenizer.from_pretrained(detokenizer_name)
 
         self.tokenizer_name = tokenizer if isinstance(tokenizer, str) else None
+        # Fast tokenizers cannot be called concurrently, e.g. when prefetching batches during attribution
+        self._tokenizer_lock = threading.Lock()
         if tokenizer is None:
             tokenizer = model if isinstance(model, str) else self.model_name
             if not tokenizer:
@@ -115,7 +121,7 @@ class HuggingfaceModel(AttributionModel):
         tokenizer_inputs = kwargs.pop("tokenizer_inputs", {})
         tokenizer_kwargs = kwargs.pop("tokenizer_kwargs", {})
 
-        if isinstance(tokenizer, PreTrainedTokenizer):
+        if isinstance(tokenizer, PreTrainedTokenizerBase):
             self.tokenizer = tokenizer
         else:
             self.tokenizer = AutoTokenizer.from_pretrained(tokenizer, *tokenizer_inputs, **tokenizer_kwargs)
@@ -131,6 +137,8 @@ class HuggingfaceModel(AttributionModel):
         self.encoder_int_embeds = None
         self.decoder_int_embeds = None
         self.is_encoder_decoder = self.model.config.is_encoder_decoder
+        # Value of use_cache in the model config before enabling gradient checkpointing
+        self._use_cache: Optional[bool] = None
         self.configure_embeddings_scale()
         self.setup(device, attribution_method, **kwargs)
 
@@ -142,7 +150,14 @@ class HuggingfaceModel(AttributionModel):
         device: str = None,
         **kwargs,
     ) -> "HuggingfaceModel":
-        """Loads a HuggingFace model and tokenizer and wraps them in the appropriate AttributionModel."""
+        """Loads a HuggingFace model and tokenizer and wraps them in the appropriate AttributionModel.
+
+        If the ``INSEQ_USE_TORCH_CACHE`` environment variable is set to 1, models loaded by identifier are serialized
+        with their tokenizer in ``INSEQ_ARTIFACTS_CACHE`` on first load, and restored with :func:`torch.load` on
+        subsequent calls without going through ``from_pretrained``.
+        """
+        if isinstance(model, str) and is_torch_cache_enabled():
+            model, tokenizer = HuggingfaceModel._load_from_torch_cache(model, tokenizer, device, kwargs)
         if isinstance(model, str):
             is_encoder_decoder = AutoConfig.from_pretrained(model).is_encoder_decoder
         else:
@@ -152,10 +167,51 @@ class HuggingfaceModel(AttributionModel):
         else:
             return HuggingfaceDecoderOnlyModel(model, attribution_method, tokenizer, device, **kwargs)
 
+    @staticmethod
+    def _load_from_torch_cache(
+        model: str,
+        tokenizer: Union[str, PreTrainedTokenizerBase, None],
+        device: Optional[str],
+        kwargs: Dict,
+    ) -> Tuple[PreTrainedModel, Union[str, PreTrainedTokenizerBase, None]]:
+        """Loads model and tokenizer through :func:`~inseq.utils.torch_model_cache`, consuming the model and tokenizer
+        loading arguments from ``kwargs``. Tokenizer instances provided by the user are kept as-is and not cached."""
+        model_args = kwargs.pop("model_args", [])
+        model_kwargs = kwargs.pop("model_kwargs", {})
+        tokenizer_inputs = kwargs.pop("tokenizer_inputs", [])
+        tokenizer_kwargs = kwargs.pop("tokenizer_kwargs", {})
+        if "output_attentions" not in model_kwargs:
+            model_kwargs["output_attentions"] = True
+        if isinstance(tokenizer, PreTrainedTokenizerBase):
+            tokenizer_name = None
+            tokenizer_load_args = None
+        else:
+            tokenizer_name = tokenizer if isinstance(tokenizer, str) else model
+            tokenizer_load_args = (tokenizer_inputs, tokenizer_kwargs)
+
+        def load_pretrained():
+            is_encoder_decoder = AutoConfig.from_pretrained(model).is_encoder_decoder
+            autoclass = AutoModelForSeq2SeqLM if is_encoder_decoder else AutoModelForCausalLM
+            pretrained_model = autoclass.from_pretrained(model, *model_args, **model_kwargs)
+            if tokenizer_name is None:
+                return pretrained_model, None
+            pretrained_tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, *tokenizer_inputs, **tokenizer_kwargs)
+            return pretrained_model, pretrained_tokenizer
+
+        cached_model, cached_tokenizer = torch_model_cache(
+            f"{model}|{tokenizer_name}",
+            load_pretrained,
+            device=device,
+            # Pickled models are only valid for the library versions used to serialize them
+            load_args=(model_args, model_kwargs, tokenizer_load_args, torch.__version__, transformers.__version__),
+        )
+        if tokenizer_name is None:
+            return cached_model, tokenizer
+        return cached_model, cached_tokenizer
+
     @AttributionModel.device.setter
-    def device(self, new_device: str) -> None:
-        check_device(new_device)
-        self._device = new_device
+    def device(self, new_device: Union[str, torch.device]) -> None:
+        self._set_device(new_device)
         # Enable compatibility with 8bit models
         if self.model:
             if not (hasattr(self.model, "is_loaded_in_8bit") and self.model.is_loaded_in_8bit):
@@ -165,6 +221,42 @@ class HuggingfaceModel(AttributionModel):
                     "The model is loaded in 8bit mode. The device cannot be changed after loading the model."
                 )
 
+    def setup(
+        self,
+        device: Optional[str] = None,
+        attribution_method: Optional[str] = None,
+        gradient_checkpointing: bool = False,
+        **kwargs,
+    ) -> None:
+        if gradient_checkpointing and not getattr(self.model, "supports_gradient_checkpointing", False):
+            logger.warning(
+                "%s does not support gradient checkpointing, which will be disabled.", self.model.__class__.__name__
+            )
+            gradient_checkpointing = False
+        super().setup(device, attribution_method, gradient_checkpointing, **kwargs)
+
+    def configure_gradient_checkpointing(self, enable: bool = True) -> None:
+        if not getattr(self.model, "supports_gradient_checkpointing", False):
+            return
+        if enable:
+            # Repeated calls must not overwrite the original use_cache value
+            if not self.model.is_gradient_checkpointing:
+                self._use_cache = self.model.config.use_cache
+            self.model.gradient_checkpointing_enable()
+            # No KV cache is needed during attribution forward passes
+            self.model.config.use_cache = False
+            # HF models only checkpoint in training mode. Only the checkpointed modules are set to training to
+            # keep dropout disabled everywhere else.
+            for module in self.model.modules():
+                if getattr(module, "gradient_checkpointing", False):
+                    module.training = True
+        else:
+            if self.model.is_gradient_checkpointing:
+                self.model.gradient_checkpointing_disable()
+                if self._use_cache is not None:
+                    self.model.config.use_cache = self._use_cache
+            self.model.eval()
+
     @abstractmethod
     def configure_embeddings_scale(self) -> None:
         """Configure the scale factor for embeddings."""
@@ -199,9 +291,7 @@ class HuggingfaceModel(AttributionModel):
             `Union[List[str], Tuple[List[str], ModelOutput]]`: Generated text or a tuple of generated text and
             generation outputs.
         """
-        if isinstance(inputs, str) or (
-            isinstance(inputs, list) and len(inputs) > 0 and all([isinstance(x, str) for x in inputs])
-        ):
+        if isinstance(inputs, str) or (isinstance(inputs, list) and len(inputs) > 0 and isinstance(inputs[0], str)):
             inputs = self.encode(inputs)
         inputs = inputs.to(self.device)
         generation_out = self.model.generate(
@@ -251,15 +341,17 @@ class HuggingfaceModel(AttributionModel):
                 max_length = max(v for _, v in self.tokenizer.max_model_input_sizes.items())
             else:
                 max_length = max_input_length
-        batch = self.tokenizer(
-            text=texts if not as_targets else None,
-            text_target=texts if as_targets else None,
-            add_special_tokens=True,
-            padding=True,
-            truncation=True,
-            max_length=max_length,
-            return_tensors="pt",
-        ).to(self.device)
+        with self._tokenizer_lock:
+            batch = self.tokenizer(
+                text=texts if not as_targets else None,
+                text_target=texts if as_targets else None,
+                add_special_tokens=True,
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="pt",
+            )
+        batch = batch.to(self.device)
         baseline_ids = None
         if return_baseline:
             if include_eos_baseline:
@@ -333,10 +425,11 @@ class HuggingfaceModel(AttributionModel):
         as_targets: bool = False,
     ) -> OneOrMoreTokenSequences:
         if isinstance(text, str):
-            ids = self.tokenizer(
-                text=text if not as_targets else None,
-                text_target=text if as_targets else None,
-            )["input_ids"]
+            with self._tokenizer_lock:
+                ids = self.tokenizer(
+                    text=text if not as_targets else None,
+                    text_target=text if as_targets else None,
+                )["input_ids"]
             return self.tokenizer.convert_ids_to_tokens(ids, skip_special_tokens)
         return [self.convert_string_to_tokens(t, skip_special_tokens, as_targets) for t in text]
 
@@ -1,68 +1,98 @@
-from .argparse import InseqArgumentParser
-from .cache import INSEQ_ARTIFACTS_CACHE, INSEQ_HOME_CACHE, cache_results
-from .errors import (
-    InseqDeprecationWarning,
-    LengthMismatchError,
-    MissingAttributionMethodError,
-    UnknownAttributionMethodError,
-)
-from .import_utils import (
-    is_captum_available,
-    is_datasets_available,
-    is_ipywidgets_available,
-    is_joblib_available,
-    is_scikitlearn_available,
-    is_sentencepiece_available,
-    is_transformers_available,
-)
-from .misc import (
-    aggregate_token_pair,
-    aggregate_token_sequence,
-    bin_str_to_ndarray,
-    drop_padding,
-    extract_signature_args,
-    find_char_indexes,
-    format_input_texts,
-    get_cls_from_instance_type,
-    get_module_name_from_object,
-    gzip_compress,
-    gzip_decompress,
-    hashodict,
-    identity_fn,
-    isnotebook,
-    lists_of_numbers_to_ndarray,
-    ndarray_to_bin_str,
-    optional,
-    pad,
-    pretty_dict,
-    pretty_list,
-    pretty_tensor,
-    rgetattr,
-    save_to_file,
-    scalar_to_numpy,
-)
-from .registry import Registry, get_available_methods
-from .serialization import json_advanced_dump, json_advanced_dumps, json_advanced_load, json_advanced_loads
-from .torch_utils import (
-    abs_max,
-    aggregate_contiguous,
-    check_device,
-    euclidean_distance,
-    get_default_device,
-    get_front_padding,
-    get_sequences_from_batched_steps,
-    normalize_attributions,
-    prod_fn,
-    remap_from_filtered,
-    sum_fn,
-    sum_normalize_attributions,
-)
+"""Utilities for Inseq. Names are resolved lazily (PEP 562) so that submodules requiring heavy dependencies
+such as torch are only imported when one of their utilities is accessed."""
+
+from importlib import import_module
+from typing import Any, List
+
+# Maps each public name to the submodule defining it
+_LAZY_IMPORTS = {
+    "InseqArgumentParser": "argparse",
+    "INSEQ_ARTIFACTS_CACHE": "cache",
+    "INSEQ_HOME_CACHE": "cache",
+    "cache_results": "cache",
+    "is_torch_cache_enabled": "cache",
+    "torch_model_cache": "cache",
+    "InseqDeprecationWarning": "errors",
+    "LengthMismatchError": "errors",
+    "MissingAttributionMethodError": "errors",
+    "UnknownAttributionMethodError": "errors",
+    "is_captum_available": "import_utils",
+    "is_datasets_available": "import_utils",
+    "is_ipywidgets_available": "import_utils",
+    "is_joblib_available": "import_utils",
+    "is_scikitlearn_available": "import_utils",
+    "is_sentencepiece_available": "import_utils",
+    "is_transformers_available": "import_utils",
+    "aggregate_token_pair": "misc",
+    "aggregate_token_sequence": "misc",
+    "bin_str_to_ndarray": "misc",
+    "check_generation_prefixes": "misc",
+    "drop_padding": "misc",
+    "extract_signature_args": "misc",
+    "find_char_indexes": "misc",
+    "format_input_texts": "misc",
+    "get_cls_from_instance_type": "misc",
+    "get_module_name_from_object": "misc",
+    "gzip_compress": "misc",
+    "gzip_decompress": "misc",
+    "hashodict": "misc",
+    "identity_fn": "misc",
+    "isnotebook": "misc",
+    "lists_of_numbers_to_ndarray": "misc",
+    "ndarray_to_bin_str": "misc",
+    "optional": "misc",
+    "pad": "misc",
+    "pretty_dict": "misc",
+    "pretty_list": "misc",
+    "pretty_tensor": "misc",
+    "rgetattr": "misc",
+    "save_to_file": "misc",
+    "scalar_to_numpy": "misc",
+    "Registry": "registry",
+    "get_available_methods": "registry",
+    "json_advanced_dump": "serialization",
+    "json_advanced_dumps": "serialization",
+    "json_advanced_load": "serialization",
+    "json_advanced_loads": "serialization",
+    "abs_max": "torch_utils",
+    "aggregate_contiguous": "torch_utils",
+    "check_device": "torch_utils",
+    "euclidean_distance": "torch_utils",
+    "get_autocast_kwargs": "torch_utils",
+    "get_default_device": "torch_utils",
+    "get_front_padding": "torch_utils",
+    "get_rank_and_world_size": "torch_utils",
+    "get_sequences_from_batched_steps": "torch_utils",
+    "get_shard_slice": "torch_utils",
+    "is_torch_compile_enabled": "torch_utils",
+    "normalize_attributions": "torch_utils",
+    "prod_fn": "torch_utils",
+    "remap_from_filtered": "torch_utils",
+    "sum_fn": "torch_utils",
+    "sum_normalize_attributions": "torch_utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_LAZY_IMPORTS[name]}", __name__), name)
+    # Cache the resolved value to bypass __getattr__ on later accesses
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
     "LengthMismatchError",
     "MissingAttributionMethodError",
     "UnknownAttributionMethodError",
     "cache_results",
+    "torch_model_cache",
+    "is_torch_cache_enabled",
     "optional",
     "identity_fn",
     "pad",
@@ -71,6 +101,7 @@ __all__ = [
     "pretty_dict",
     "aggregate_token_pair",
     "aggregate_token_sequence",
+    "check_generation_prefixes",
     "format_input_texts",
     "rgetattr",
     "get_available_methods",
@@ -101,6 +132,10 @@ __all__ = [
     "is_joblib_available",
     "check_device",
     "get_default_device",
+    "get_autocast_kwargs",
+    "get_rank_and_world_size",
+    "get_shard_slice",
+    "is_torch_compile_enabled",
     "ndarray_to_bin_str",
     "hashodict",
     "InseqDeprecationWarning",
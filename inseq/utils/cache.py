@@ -1,9 +1,13 @@
+import hashlib
+import inspect
 import logging
 import os
 import pickle
+import re
+import tempfile
 from functools import wraps
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,14 @@ INSEQ_HOME_CACHE = os.path.expanduser(os.getenv("INSEQ_HOME", DEFAULT_INSEQ_HOME
 DEFAULT_INSEQ_ARTIFACTS_CACHE = os.path.join(INSEQ_HOME_CACHE, "artifacts")
 INSEQ_ARTIFACTS_CACHE = Path(os.getenv("INSEQ_ARTIFACTS_CACHE", DEFAULT_INSEQ_ARTIFACTS_CACHE))
 
+# Default object representations include the memory address, which changes across runs
+UNSTABLE_REPR_PATTERN = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def is_torch_cache_enabled() -> bool:
+    """Whether models loaded by identifier should be cached as torch-serialized blobs (``INSEQ_USE_TORCH_CACHE=1``)."""
+    return os.getenv("INSEQ_USE_TORCH_CACHE", "0").lower() in ("1", "true", "yes")
+
 
 def cache_results(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
     @wraps(func)
@@ -43,3 +55,73 @@ def cache_results(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
         return cached
 
     return cache_results_wrapper
+
+
+def _stable_repr(obj: Any) -> str:
+    """Returns a representation of ``obj`` that does not depend on the insertion order of dictionaries.
+
+    Raises a ValueError if the representation of ``obj`` is not stable across runs (e.g. it includes a memory address).
+    """
+    if isinstance(obj, dict):
+        items = sorted((_stable_repr(key), _stable_repr(value)) for key, value in obj.items())
+        return "{" + ", ".join(f"{key}: {value}" for key, value in items) + "}"
+    if isinstance(obj, (list, tuple)):
+        return type(obj).__name__ + "(" + ", ".join(_stable_repr(value) for value in obj) + ")"
+    obj_repr = repr(obj)
+    if UNSTABLE_REPR_PATTERN.search(obj_repr):
+        raise ValueError(f"Object {obj_repr} has no stable representation.")
+    return obj_repr
+
+
+def torch_model_cache(
+    model_name: str,
+    load_fn: Callable[[], Tuple[Any, Any]],
+    device: Optional[str] = None,
+    load_args: Any = None,
+    cache_dir: Path = INSEQ_ARTIFACTS_CACHE / "torch_models",
+) -> Tuple[Any, Any]:
+    """Loads a ``(model, tokenizer)`` pair from a torch-serialized blob, building it with ``load_fn`` on cache miss.
+
+    Hits skip config parsing, model instantiation and checkpoint loading entirely, restoring the pickled objects with
+    :func:`torch.load` (memory-mapped when supported by the installed torch version). Blobs are written to a temporary
+    file and moved in place once complete, so that concurrent processes never load a partially written blob.
+
+    Args:
+        model_name (:obj:`str`): The identifier of the cached model.
+        load_fn (:obj:`Callable`): A function returning the ``(model, tokenizer)`` pair, called on cache miss.
+        device (:obj:`str`, `optional`): The device to which tensors are mapped when loading from cache.
+        load_args (`optional`): All arguments used by ``load_fn`` to build the model and tokenizer, part of the cache
+            key. Dictionaries are hashed regardless of their key order. If some arguments have no representation that
+            is stable across runs, the model is loaded with ``load_fn`` without caching it.
+        cache_dir (:obj:`Path`, `optional`): The directory containing the cached blobs.
+
+    Returns:
+        :obj:`tuple`: The cached or freshly loaded model and tokenizer.
+    """
+    import torch
+
+    try:
+        cache_key = hashlib.sha256(_stable_repr((model_name, load_args)).encode("utf-8")).hexdigest()
+    except ValueError as e:
+        logger.warning(f"Cannot cache model {model_name}: {e} Loading it without caching.")
+        return load_fn()
+    cache_filename = Path(os.path.expanduser(cache_dir)) / f"{cache_key}.pt"
+    if cache_filename.exists():
+        logger.info(f"Loading cached model {model_name} from {cache_filename}")
+        load_kwargs = {"map_location": device, "weights_only": False}
+        if "mmap" in inspect.signature(torch.load).parameters:
+            load_kwargs["mmap"] = True
+        cached = torch.load(cache_filename, **load_kwargs)  # nosec
+        return cached["model"], cached["tokenizer"]
+    logger.info(f"Cached model not found in {cache_filename}. Loading {model_name}...")
+    model, tokenizer = load_fn()
+    cache_filename.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=cache_filename.parent, suffix=".tmp", delete=False) as f:
+        tmp_filename = f.name
+    try:
+        torch.save({"model": model, "tokenizer": tokenizer}, tmp_filename)
+        os.replace(tmp_filename, cache_filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+    return model, tokenizer
@@ -178,11 +178,14 @@ def drop_padding(seq: Sequence[Any], pad_id: Any):
     return list(reversed(list(dropwhile(lambda x: x == pad_id, reversed(seq)))))
 
 
+@functools.lru_cache(maxsize=1)
 def isnotebook():
     """Returns true if code is being executed in a notebook, false otherwise
 
     Currently supported: Jupyter Notebooks, Google Colab
     To validate: Kaggle Notebooks, JupyterLab
+
+    The result is cached, since the execution environment does not change at runtime.
     """
     try:
         from IPython import get_ipython
@@ -216,6 +219,17 @@ def format_input_texts(
     return texts, reference_texts
 
 
+def check_generation_prefixes(texts: List[str], generated_texts: List[str]) -> None:
+    """Raises a ValueError if some generated texts do not start with their respective input texts, as required for
+    decoder-only models."""
+    mismatched_idxs = [idx for idx, (gen, inp) in enumerate(zip(generated_texts, texts)) if not gen.startswith(inp)]
+    if mismatched_idxs:
+        raise ValueError(
+            "Forced generations with decoder-only models must start with the input texts. "
+            f"Mismatch found at indices: {mismatched_idxs[:5]}{'...' if len(mismatched_idxs) > 5 else ''}"
+        )
+
+
 def aggregate_token_sequence(token_sequence, spans):
     if not spans:
         return token_sequence
@@ -1,7 +1,10 @@
 import logging
-from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple, Union
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
+import torch.distributed as dist
 from torch.backends.cuda import is_built as is_cuda_built
 from torch.backends.mps import is_available as is_mps_available
 from torch.backends.mps import is_built as is_mps_built
@@ -189,6 +192,7 @@ def check_device(device_name: str) -> bool:
     return True
 
 
+@lru_cache(maxsize=1)
 def get_default_device() -> str:
     if is_cuda_available() and is_cuda_built():
         return "cuda"
@@ -198,3 +202,42 @@ def get_default_device() -> str:
         return "cpu"
     else:
         return "cpu"
+
+
+def _reset_device_cache() -> None:
+    """Clears the cached result of :func:`get_default_device`, e.g. after changing visible devices in tests."""
+    get_default_device.cache_clear()
+
+
+def get_autocast_kwargs(device: Union[str, torch.device]) -> Dict[str, Any]:
+    """Returns the arguments for :obj:`torch.autocast` enabling mixed precision on CUDA devices, using bfloat16 if
+    supported and float16 otherwise. Autocast is disabled on other devices."""
+    is_cuda = torch.device(device).type == "cuda"
+    dtype = torch.float16 if is_cuda and not torch.cuda.is_bf16_supported() else torch.bfloat16
+    return {"device_type": "cuda" if is_cuda else "cpu", "dtype": dtype, "enabled": is_cuda}
+
+
+def is_torch_compile_enabled() -> bool:
+    """Whether the wrapped model should be compiled with :obj:`torch.compile` during setup
+    (``INSEQ_TORCH_COMPILE=1``). Requires ``torch>=2.0``."""
+    return os.getenv("INSEQ_TORCH_COMPILE", "0").lower() in ("1", "true", "yes") and hasattr(torch, "compile")
+
+
+def get_rank_and_world_size() -> Tuple[int, int]:
+    """Returns the rank of the current process and the world size if :mod:`torch.distributed` is initialized,
+    or ``(0, 1)`` for single-process execution."""
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return 0, 1
+
+
+def get_shard_slice(num_items: int, rank: int, world_size: int) -> slice:
+    """Returns the contiguous slice of ``num_items`` elements assigned to ``rank`` among ``world_size`` processes.
+
+    Contiguous shards (as opposed to strided ones) preserve the original ordering when per-rank results are gathered
+    and concatenated by rank.
+    """
+    shard_size, remainder = divmod(num_items, world_size)
+    start = rank * shard_size + min(rank, remainder)
+    end = start + shard_size + (rank < remainder)
+    return slice(start, end)
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from inseq.attr.feat import FeatureAttribution
+from inseq.data import FeatureAttributionOutput
+from inseq.models.attribution_model import AttributionModel
+
+
+class DummyAttribution:
+    attribute_batch_ids = False
+    forward_batch_embeds = True
+
+    def __init__(self, method_name, **kwargs):
+        self.method_name = method_name
+        self.kwargs = kwargs
+        self.calls = []
+
+    def hook(self, **kwargs):
+        self.calls.append("hook")
+
+    def unhook(self, **kwargs):
+        self.calls.append("unhook")
+
+
+@pytest.fixture
+def model(monkeypatch):
+    loaded = []
+
+    def load(method_name, attribution_model=None, **kwargs):
+        loaded.append(method_name)
+        return DummyAttribution(method_name, **kwargs)
+
+    monkeypatch.setattr(FeatureAttribution, "load", load)
+    return SimpleNamespace(
+        _attribution_method_cache=OrderedDict(),
+        _ATTRIBUTION_METHOD_CACHE_SIZE=2,
+        loaded=loaded,
+    )
+
+
+def load_cached(model, method, **kwargs):
+    return AttributionModel._load_cached_attribution_method(model, method, **kwargs)
+
+
+def test_attribution_method_cache_hit(model):
+    method = load_cached(model, "saliency", baselines=[0, 1])
+    # Unhashable arguments are part of the key through their repr
+    assert load_cached(model, "saliency", baselines=[0, 1]) is method
+    assert load_cached(model, "saliency", baselines=[1, 0]) is not method
+    assert model.loaded == ["saliency", "saliency"]
+    # Cached instances are unhooked before being hooked again
+    assert method.calls == ["unhook", "hook"]
+
+
+def test_attribution_method_cache_eviction(model):
+    saliency = load_cached(model, "saliency")
+    load_cached(model, "input_x_gradient")
+    # Refreshing saliency makes input_x_gradient the least recently used method
+    assert load_cached(model, "saliency") is saliency
+    load_cached(model, "deeplift")
+    assert [key[0] for key in model._attribution_method_cache] == ["saliency", "deeplift"]
+    load_cached(model, "input_x_gradient")
+    assert model.loaded == ["saliency", "input_x_gradient", "deeplift", "input_x_gradient"]
+
+
+@pytest.mark.parametrize(
+    ("method_name", "attribute_batch_ids", "forward_batch_embeds", "supported"),
+    [
+        ("saliency", False, True, True),
+        ("discretized_integrated_gradients", True, True, True),
+        ("layer_integrated_gradients", True, False, False),
+        ("deeplift", False, True, False),
+        ("lime", False, True, False),
+    ],
+)
+def test_supports_compiled_model(method_name, attribute_batch_ids, forward_batch_embeds, supported):
+    method = SimpleNamespace(
+        method_name=method_name, attribute_batch_ids=attribute_batch_ids, forward_batch_embeds=forward_batch_embeds
+    )
+    assert AttributionModel.supports_compiled_model(method) is supported
+
+
+class DummyBatchingModel(AttributionModel):
+    def encode(self, texts, as_targets=False, return_baseline=False, include_eos_baseline=False):
+        return list(texts)
+
+
+# Only encoding is needed to test batching in attribute
+DummyBatchingModel.__abstractmethods__ = frozenset()
+
+
+class DummyBatchingAttribution(DummyAttribution):
+    def get_attribution_args(self, **kwargs):
+        return {}, kwargs
+
+    def prepare_and_attribute(self, sources, targets, **kwargs):
+        self.calls.append((sources, targets))
+        return [len(self.calls)]
+
+
+@pytest.fixture
+def batching_model(monkeypatch):
+    monkeypatch.setattr(
+        FeatureAttributionOutput,
+        "merge_attributions",
+        classmethod(lambda cls, attributions: SimpleNamespace(attributions=attributions, info={})),
+    )
+    model = DummyBatchingModel()
+    model.is_hooked = True
+    return model
+
+
+def attribute_batches(model, method_name, is_encoder_decoder, input_texts, generated_texts, batch_size):
+    model.is_encoder_decoder = is_encoder_decoder
+    model.attribution_method = DummyBatchingAttribution(method_name)
+    out = model.attribute(input_texts, generated_texts, batch_size=batch_size, show_progress=False)
+    assert out.attributions == list(range(1, len(model.attribution_method.calls) + 1))
+    assert out.info["input_texts"] == input_texts
+    assert out.info["generated_texts"] == generated_texts
+    return model.attribution_method.calls
+
+
+def test_attribute_batches_in_order(batching_model):
+    input_texts = [f"input {idx}" for idx in range(5)]
+    generated_texts = [f"output {idx}" for idx in range(5)]
+    batches = attribute_batches(batching_model, "saliency", True, input_texts, generated_texts, batch_size=2)
+    assert batches == [
+        (input_texts[0:2], generated_texts[0:2]),
+        (input_texts[2:4], generated_texts[2:4]),
+        (input_texts[4:5], generated_texts[4:5]),
+    ]
+
+
+@pytest.mark.parametrize(("method_name", "is_encoder_decoder"), [("lime", True), ("saliency", False)])
+def test_attribute_batch_size_overrides(batching_model, method_name, is_encoder_decoder):
+    # LIME and constrained decoding with decoder-only models do not support batching
+    input_texts = [f"input {idx}" for idx in range(3)]
+    generated_texts = [f"{text} output" for text in input_texts]
+    batches = attribute_batches(
+        batching_model, method_name, is_encoder_decoder, input_texts, generated_texts, batch_size=2
+    )
+    assert batches == [([inp], [gen]) for inp, gen in zip(input_texts, generated_texts)]
+
+
+def test_attribute_unhooks_temporary_method_on_error(batching_model, monkeypatch):
+    class FailingAttribution(DummyBatchingAttribution):
+        def prepare_and_attribute(self, sources, targets, **kwargs):
+            raise RuntimeError("Attribution failed")
+
+    temporary_method = FailingAttribution("saliency")
+    monkeypatch.setattr(FeatureAttribution, "load", lambda method_name, attribution_model=None, **kw: temporary_method)
+    batching_model.attribution_method = DummyBatchingAttribution("attention")
+    with pytest.raises(RuntimeError):
+        batching_model.attribute(["input"], ["output"], method="saliency", show_progress=False)
+    assert temporary_method.calls == ["unhook"]
+
+
+@pytest.mark.parametrize(("method_name", "uses_compiled_model"), [("saliency", True), ("deeplift", False)])
+def test_attribute_restores_compiled_model_on_error(batching_model, method_name, uses_compiled_model):
+    class FailingAttribution(DummyBatchingAttribution):
+        def prepare_and_attribute(self, sources, targets, **kwargs):
+            self.calls.append(batching_model.model)
+            raise RuntimeError("Attribution failed")
+
+    compiled_model = torch.nn.Module()
+    compiled_model._orig_mod = torch.nn.Linear(1, 1)
+    batching_model.model = compiled_model
+    batching_model.attribution_method = FailingAttribution(method_name)
+    with pytest.raises(RuntimeError):
+        batching_model.attribute(["input"], ["output"], show_progress=False)
+    used_model = compiled_model if uses_compiled_model else compiled_model._orig_mod
+    assert batching_model.attribution_method.calls == [used_model]
+    assert batching_model.model is compiled_model
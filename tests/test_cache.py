@@ -0,0 +1,48 @@
+import torch
+
+from inseq.utils import torch_model_cache
+
+
+def _counting_load_fn(calls):
+    def load_fn():
+        calls.append(1)
+        return {"weight": torch.arange(4.0)}, "tokenizer"
+
+    return load_fn
+
+
+def test_torch_model_cache_miss_and_hit(tmp_path):
+    calls = []
+    load_args = ((), {"torch_dtype": torch.float16, "revision": "main"}, None)
+    model, tokenizer = torch_model_cache("dummy", _counting_load_fn(calls), load_args=load_args, cache_dir=tmp_path)
+    assert len(calls) == 1
+    assert [path.suffix for path in tmp_path.iterdir()] == [".pt"]
+    # Same arguments in a different order hit the cache without calling load_fn
+    load_args = ((), {"revision": "main", "torch_dtype": torch.float16}, None)
+    cached_model, cached_tokenizer = torch_model_cache(
+        "dummy", _counting_load_fn(calls), device="cpu", load_args=load_args, cache_dir=tmp_path
+    )
+    assert len(calls) == 1
+    assert torch.equal(cached_model["weight"], model["weight"])
+    assert cached_tokenizer == tokenizer
+
+
+def test_torch_model_cache_key_includes_load_args(tmp_path):
+    calls = []
+    torch_model_cache("dummy", _counting_load_fn(calls), load_args=((), {}, None), cache_dir=tmp_path)
+    torch_model_cache(
+        "dummy", _counting_load_fn(calls), load_args=((), {"trust_remote_code": True}, None), cache_dir=tmp_path
+    )
+    torch_model_cache("other", _counting_load_fn(calls), load_args=((), {}, None), cache_dir=tmp_path)
+    assert len(calls) == 3
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_torch_model_cache_skips_unstable_load_args(tmp_path):
+    calls = []
+    load_args = ((), {"quantization_config": object()}, None)
+    for _ in range(2):
+        torch_model_cache("dummy", _counting_load_fn(calls), load_args=load_args, cache_dir=tmp_path)
+    # Arguments without a stable representation cannot be part of the key, so nothing is cached
+    assert len(calls) == 2
+    assert list(tmp_path.iterdir()) == []
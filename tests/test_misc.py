@@ -0,0 +1,15 @@
+import pytest
+
+from inseq.utils import check_generation_prefixes
+
+
+def test_check_generation_prefixes():
+    check_generation_prefixes(["Hello", "How are"], ["Hello world", "How are you?"])
+
+
+def test_check_generation_prefixes_mismatch():
+    with pytest.raises(ValueError, match=r"Mismatch found at indices: \[1, 2\]"):
+        check_generation_prefixes(["Hello", "How are", "Good"], ["Hello world", "Who are you?", "Bad"])
+    texts = [str(idx) for idx in range(7)]
+    with pytest.raises(ValueError, match=r"\[0, 1, 2, 3, 4\]\.\.\."):
+        check_generation_prefixes(texts, ["x" + text for text in texts])
@@ -0,0 +1,15 @@
+import pytest
+
+from inseq.utils import get_shard_slice
+
+
+@pytest.mark.parametrize("num_items", [0, 1, 5, 7, 8, 13])
+@pytest.mark.parametrize("world_size", [1, 2, 3, 8])
+def test_get_shard_slice(num_items, world_size):
+    items = list(range(num_items))
+    shards = [items[get_shard_slice(num_items, rank, world_size)] for rank in range(world_size)]
+    # Concatenating shards by rank restores the original items in order
+    assert [item for shard in shards for item in shard] == items
+    # The first num_items % world_size ranks get one extra item
+    base_size, remainder = divmod(num_items, world_size)
+    assert [len(shard) for shard in shards] == [base_size + (rank < remainder) for rank in range(world_size)]